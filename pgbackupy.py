@@ -1,18 +1,40 @@
 import asyncpg
 import asyncio
-import pandas as pd
+import csv
+import gzip
+import io
 import os
+import shutil
+import sys
 from datetime import datetime
 import logging
 from dotenv import load_dotenv
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Units used by _format_bytes, one per power of 1024
+BYTE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+
+# Converters that make bool and bytea columns in the chunked (non-COPY) path
+# match COPY's CSV text. Other types can still differ from COPY there:
+# arrays, intervals, timestamptz offsets, and empty strings vs NULL (both
+# written as an empty field)
+CSV_TYPE_CONVERTERS = {
+    'bool': lambda value: 't' if value else 'f',
+    'bytea': lambda value: '\\x' + value.hex(),
+}
+
+# Supported output compression formats and their file extensions
+COMPRESSION_EXTENSIONS = {
+    'gzip': '.gz',
+}
+
 class AsyncPostgreSQLDownloader:
-    def __init__(self, host: str, database: str, username: str, password: str, port: int = 5432, max_connections: int = 10):
+    def __init__(self, host: str, database: str, username: str, password: str, port: int = 5432, max_connections: int = 10,
+                 download_timeout: float = 3600):
         """
         Initialize AsyncPostgreSQL connection parameters
         
@@ -23,6 +45,7 @@ class AsyncPostgreSQLDownloader:
             password (str): Password
             port (int): Port number (default: 5432)
             max_connections (int): Maximum concurrent connections (default: 10)
+            download_timeout (float): Seconds allowed for a single table export (default: 3600)
         """
         self.host = host
         self.database = database
@@ -30,10 +53,21 @@ class AsyncPostgreSQLDownloader:
         self.password = password
         self.port = port
         self.max_connections = max_connections
+        self.download_timeout = download_timeout
         self.connection_pool = None
         
-    async def create_pool(self):
-        """Create connection pool"""
+    async def create_pool(self, max_concurrent: Optional[int] = None):
+        """
+        Create connection pool
+        
+        Args:
+            max_concurrent (int): Planned concurrent table downloads; the pool is
+                grown to leave one connection spare for metadata queries
+        """
+        if max_concurrent is not None and self.max_connections < max_concurrent + 1:
+            logger.info(f"Raising pool size to {max_concurrent + 1} for {max_concurrent} concurrent downloads")
+            self.max_connections = max_concurrent + 1
+        
         try:
             self.connection_pool = await asyncpg.create_pool(
                 host=self.host,
@@ -43,7 +77,11 @@ class AsyncPostgreSQLDownloader:
                 port=self.port,
                 min_size=1,
                 max_size=self.max_connections,
-                command_timeout=300,  # 5 minutes timeout for large queries
+                command_timeout=300,  # 5 minutes for metadata queries; exports use download_timeout
+                # Metadata queries repeat once per table; keep their prepared
+                # statements for the lifetime of each connection
+                statement_cache_size=1024,
+                max_cached_statement_lifetime=0,
                 server_settings={
                     'application_name': 'postgres_table_downloader',
                 }
@@ -64,43 +102,105 @@ class AsyncPostgreSQLDownloader:
         Returns:
             List[str]: List of table names
         """
+        # Same (privilege-filtered) table list that download_all_tables uses
+        table_infos = await self.get_all_table_infos(schema)
+        return [info['table_name'] for info in table_infos]
+    
+    async def get_all_table_infos(self, schema: str = 'public') -> List[Dict]:
+        """
+        Get row count estimates and sizes for all tables in one query
+        
+        Args:
+            schema (str): Schema name (default: 'public')
+            
+        Returns:
+            List[Dict]: Table information in the same format as get_table_info
+        """
         try:
             async with self.connection_pool.acquire() as connection:
+                # reltuples is the planner's estimate (-1 if never analyzed),
+                # which is plenty for scheduling and avoids a COUNT(*) per table.
+                # pg_class is not privilege-filtered, so skip tables we can't read
                 query = """
-                    SELECT table_name 
-                    FROM information_schema.tables 
-                    WHERE table_schema = $1 AND table_type = 'BASE TABLE'
-                    ORDER BY table_name;
+                    SELECT c.relname AS table_name,
+                           GREATEST(c.reltuples, 0)::bigint AS row_count,
+                           pg_size_pretty(pg_total_relation_size(c.oid)) AS size,
+                           pg_total_relation_size(c.oid) AS size_bytes
+                    FROM pg_class c
+                    JOIN pg_namespace n ON n.oid = c.relnamespace
+                    WHERE n.nspname = $1 AND c.relkind IN ('r', 'p')
+                      AND has_table_privilege(c.oid, 'SELECT')
+                    ORDER BY c.relname;
                 """
                 rows = await connection.fetch(query, schema)
-                tables = [row['table_name'] for row in rows]
-                logger.info(f"Found {len(tables)} tables in schema '{schema}'")
-                return tables
+                table_infos = [dict(row) for row in rows]
+                logger.info(f"Found {len(table_infos)} tables in schema '{schema}'")
+                return table_infos
         except Exception as e:
-            logger.error(f"Error getting table list: {e}")
+            logger.error(f"Error getting table information: {e}")
             return []
     
-    async def get_table_info(self, table_name: str, schema: str = 'public') -> Dict:
-        """Get table information including row count and size"""
+    async def get_all_table_columns(self, schema: str = 'public') -> Optional[Dict[str, List[str]]]:
+        """
+        Get column names of all tables in the specified schema in one query
+        
+        Args:
+            schema (str): Schema name (default: 'public')
+            
+        Returns:
+            Dict[str, List[str]]: Column names in ordinal order keyed by table name,
+                or None if the lookup failed
+        """
         try:
             async with self.connection_pool.acquire() as connection:
-                # Get row count
-                count_query = f'SELECT COUNT(*) FROM "{schema}"."{table_name}"'
-                row_count = await connection.fetchval(count_query)
-                
-                # Get table size
-                size_query = """
-                    SELECT pg_size_pretty(pg_total_relation_size(to_regclass($1))) as size,
-                           pg_total_relation_size(to_regclass($1)) as size_bytes
+                query = """
+                    SELECT table_name,
+                           array_agg(column_name::text ORDER BY ordinal_position) AS column_names
+                    FROM information_schema.columns
+                    WHERE table_schema = $1
+                    GROUP BY table_name;
                 """
-                size_result = await connection.fetchrow(size_query, f'{schema}.{table_name}')
-                
-                return {
-                    'table_name': table_name,
-                    'row_count': row_count,
-                    'size': size_result['size'],
-                    'size_bytes': size_result['size_bytes']
-                }
+                rows = await connection.fetch(query, schema)
+                return {row['table_name']: row['column_names'] for row in rows}
+        except Exception as e:
+            logger.error(f"Error getting column list: {e}")
+            return None
+    
+    async def get_table_info(self, table_name: str, schema: str = 'public', connection=None) -> Dict:
+        """
+        Get table information including estimated row count and size
+        
+        Args:
+            table_name (str): Name of the table
+            schema (str): Schema name (default: 'public')
+            connection: Connection to reuse instead of acquiring one from the pool
+            
+        Returns:
+            Dict: Table name, row count estimate and size
+        """
+        try:
+            if connection is None:
+                async with self.connection_pool.acquire() as connection:
+                    return await self.get_table_info(table_name, schema, connection)
+            
+            # Row estimate and size come from the catalog, so no table scan is needed
+            info_query = """
+                SELECT GREATEST(reltuples, 0)::bigint AS row_count,
+                       pg_size_pretty(pg_total_relation_size(oid)) AS size,
+                       pg_total_relation_size(oid) AS size_bytes
+                FROM pg_class
+                WHERE oid = to_regclass($1)
+            """
+            info_result = await connection.fetchrow(info_query, self._qualified_name(schema, table_name))
+            if info_result is None:
+                raise ValueError(f"relation '{schema}.{table_name}' not found")
+            
+            return {
+                'table_name': table_name,
+                'row_count': info_result['row_count'],
+                'size': info_result['size'],
+                'size_bytes': info_result['size_bytes']
+            }
         except Exception as e:
             logger.error(f"Error getting info for table '{table_name}': {e}")
             return {
@@ -111,125 +211,335 @@ class AsyncPostgreSQLDownloader:
             }
     
     async def download_table_to_csv(self, table_name: str, output_dir: str = 'downloaded_tables', 
-                                schema: str = 'public', chunk_size: int = 10000) -> bool:
+                                schema: str = 'public', chunk_size: Optional[int] = None,
+                                use_copy: bool = True, parallel_threshold: int = 10_000_000,
+                                parallel_workers: int = 4,
+                                columns_map: Optional[Dict[str, List[str]]] = None,
+                                compression: Optional[str] = None) -> bool:
         """
-        Download a specific table to CSV file with chunked processing for large tables
+        Download a specific table to CSV file using COPY or chunked cursor streaming
         
         Args:
             table_name (str): Name of the table to download
             output_dir (str): Output directory for CSV files
             schema (str): Schema name (default: 'public')
-            chunk_size (int): Number of rows to process at once for large tables
+            chunk_size (int): Number of rows to fetch at once when not using COPY
+                (default: sized from the table's average row width)
+            use_copy (bool): Let the server format the CSV via COPY (default: True).
+                Without COPY, values are written in Python's text form, which for
+                some types (e.g. arrays, intervals) differs from PostgreSQL's
+            parallel_threshold (int): Estimated row count above which COPY is split
+                across several connections by primary key hash
+            parallel_workers (int): Number of parallel COPY streams for such tables
+            columns_map (Dict[str, List[str]]): Pre-fetched column names per table
+                (see get_all_table_columns); skips the per-table existence query
+            compression (str): Compress output on the fly ('gzip') or None for plain CSV
             
         Returns:
             bool: True if successful, False otherwise
         """
         try:
+            if compression is not None and compression not in COMPRESSION_EXTENSIONS:
+                raise ValueError(f"Unsupported compression '{compression}'")
+            
             # Create output directory if it doesn't exist
             os.makedirs(output_dir, exist_ok=True)
             
             # Generate filename with timestamp
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"{table_name}_{timestamp}.csv"
+            filename = f"{table_name}_{timestamp}.csv{COMPRESSION_EXTENSIONS.get(compression, '')}"
             filepath = os.path.join(output_dir, filename)
+            qualified_name = self._qualified_name(schema, table_name)
+            parallel_key = None
             
             async with self.connection_pool.acquire() as connection:
                 # First, check if table exists by trying to get its columns
                 try:
-                    columns_query = """
-                        SELECT column_name 
-                        FROM information_schema.columns 
-                        WHERE table_schema = $1 AND table_name = $2
-                        ORDER BY ordinal_position
-                    """
-                    columns = await connection.fetch(columns_query, schema, table_name)
+                    if columns_map is not None:
+                        columns = columns_map.get(table_name)
+                    else:
+                        columns_query = """
+                            SELECT column_name 
+                            FROM information_schema.columns 
+                            WHERE table_schema = $1 AND table_name = $2
+                            ORDER BY ordinal_position
+                        """
+                        columns = await connection.fetch(columns_query, schema, table_name)
                     
                     if not columns:
                         # Table doesn't exist
                         logger.error(f"Table '{schema}.{table_name}' does not exist")
                         return False
-                        
-                    column_names = [col['column_name'] for col in columns]
                     
                 except Exception as e:
                     logger.error(f"Error checking table existence for '{table_name}': {e}")
                     return False
                 
                 # Get table info (row count, etc.)
-                table_info = await self.get_table_info(table_name, schema)
+                table_info = await self.get_table_info(table_name, schema, connection=connection)
                 row_count = table_info['row_count']
                 
-                if row_count == 0:
-                    # Create empty CSV for tables with no data (but table exists)
-                    df = pd.DataFrame(columns=column_names)
-                    df.to_csv(filepath, index=False)
-                    logger.info(f"Downloaded empty table '{table_name}' to {filepath}")
-                    return True
-                
-                # For large tables, use chunked processing
-                if row_count > chunk_size:
-                    logger.info(f"Large table detected ({row_count:,} rows). Using chunked processing...")
+                if not use_copy:
+                    if chunk_size is None:
+                        chunk_size = await self._estimate_chunk_size(connection, table_name, schema)
+                    logger.info(f"Using chunked processing for '{table_name}' "
+                                f"(~{row_count:,} rows, {chunk_size:,} per chunk)...")
                     return await self._download_large_table_chunked(
-                        connection, table_name, schema, filepath, chunk_size, row_count
+                        connection, table_name, qualified_name, filepath, chunk_size, row_count,
+                        compression
                     )
-                else:
-                    # Small table - download all at once
-                    query = f'SELECT * FROM "{schema}"."{table_name}"'
-                    rows = await connection.fetch(query)
-                    
-                    if rows:
-                        # Convert to pandas DataFrame
-                        df = pd.DataFrame([dict(row) for row in rows])
-                        df.to_csv(filepath, index=False)
-                    else:
-                        # Empty result (shouldn't happen since row_count > 0, but just in case)
-                        df = pd.DataFrame(columns=column_names)
-                        df.to_csv(filepath, index=False)
+                
+                if row_count > parallel_threshold and parallel_workers > 1:
+                    parallel_key = await self._get_primary_key_column(connection, qualified_name)
+                    if parallel_key is None:
+                        logger.info(f"Table '{table_name}' has no single-column primary key. "
+                                    f"Using a single COPY stream...")
+                
+                if parallel_key is None:
+                    # Let the server stream CSV straight to disk via COPY; the
+                    # rows never become Python objects on the way
+                    with self._open_output(filepath, compression) as output:
+                        status = await connection.copy_from_query(
+                            f'SELECT * FROM {qualified_name}',
+                            output=output, format='csv', header=True,
+                            timeout=self.download_timeout
+                        )
+                    copied_rows = int(status.split()[-1])
                     
-                    logger.info(f"Downloaded table '{table_name}' to {filepath} ({row_count:,} rows)")
+                    logger.info(f"Downloaded table '{table_name}' to {filepath} ({copied_rows:,} rows)")
                     return True
+                
+                # Our connection coordinates the shards: it exports the snapshot
+                # they all read from and copies the first shard itself
+                logger.info(f"Very large table detected (~{row_count:,} rows). "
+                            f"Using {parallel_workers} parallel COPY streams...")
+                return await self._download_table_parallel_copy(
+                    connection, table_name, qualified_name, filepath, parallel_key,
+                    parallel_workers, compression
+                )
                     
         except Exception as e:
             logger.error(f"Error downloading table '{table_name}': {e}")
             return False
     
-    async def _download_large_table_chunked(self, connection, table_name: str, schema: str, 
-                                          filepath: str, chunk_size: int, total_rows: int) -> bool:
-        """Download large table in chunks to manage memory"""
+    async def _download_large_table_chunked(self, connection, table_name: str, qualified_name: str, 
+                                          filepath: str, chunk_size: int, total_rows: int,
+                                          compression: Optional[str] = None) -> bool:
+        """Download table in chunks through a server-side cursor to manage memory"""
         try:
-            offset = 0
-            first_chunk = True
+            downloaded = 0
             
-            while offset < total_rows:
-                query = f'SELECT * FROM "{schema}"."{table_name}" LIMIT $1 OFFSET $2'
-                rows = await connection.fetch(query, chunk_size, offset)
-                
-                if not rows:
-                    break
-                
-                # Convert to DataFrame
-                df = pd.DataFrame([dict(row) for row in rows])
-                
-                # Write to CSV (append mode after first chunk)
-                if first_chunk:
-                    df.to_csv(filepath, index=False, mode='w')
-                    first_chunk = False
-                else:
-                    df.to_csv(filepath, index=False, mode='a', header=False)
+            # Server-side cursors only live inside a transaction; stream the
+            # table in a single pass instead of re-scanning with OFFSET
+            async with connection.transaction():
+                statement = await connection.prepare(f'SELECT * FROM {qualified_name}')
+                attributes = statement.get_attributes()
+                column_names = [attr.name for attr in attributes]
+                format_row = self._build_row_formatter(attributes)
+                cursor = await statement.cursor()
                 
-                offset += len(rows)
-                progress = (offset / total_rows) * 100
-                logger.info(f"Progress for '{table_name}': {offset:,}/{total_rows:,} rows ({progress:.1f}%)")
+                # Keep one handle open for the whole table rather than reopening
+                # the file in append mode for every chunk
+                with self._open_output(filepath, compression, text=True) as csv_file:
+                    # Each chunk is formatted into one reused buffer and written
+                    # with a single call; '\n' line endings match COPY output
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer, lineterminator='\n')
+                    
+                    def write_chunk(rows):
+                        buffer.seek(0)
+                        buffer.truncate()
+                        writer.writerows(rows)
+                        csv_file.write(buffer.getvalue())
+                    
+                    # Header first, so empty tables still get one
+                    await asyncio.to_thread(write_chunk, [column_names])
+                    
+                    rows = await cursor.fetch(chunk_size, timeout=self.download_timeout)
+                    while rows:
+                        # Encode and write this chunk in a worker thread while the
+                        # next one is fetched, so the event loop stays free for
+                        # other downloads and the database is never left idle
+                        write_task = asyncio.create_task(asyncio.to_thread(
+                            write_chunk, map(format_row, rows) if format_row else rows
+                        ))
+                        try:
+                            next_rows = await cursor.fetch(chunk_size, timeout=self.download_timeout)
+                        finally:
+                            await write_task
+                        
+                        downloaded += len(rows)
+                        # total_rows is an estimate and may be stale
+                        expected_rows = max(total_rows, downloaded)
+                        progress = (downloaded / expected_rows) * 100
+                        logger.info(f"Progress for '{table_name}': {downloaded:,}/{expected_rows:,} rows ({progress:.1f}%)")
+                        rows = next_rows
             
-            logger.info(f"Downloaded large table '{table_name}' to {filepath} ({total_rows:,} rows)")
+            logger.info(f"Downloaded large table '{table_name}' to {filepath} ({downloaded:,} rows)")
             return True
             
         except Exception as e:
             logger.error(f"Error in chunked download for '{table_name}': {e}")
             return False
     
+    @staticmethod
+    def _build_row_formatter(attributes) -> Optional[Callable]:
+        """
+        Generate a row formatter specialized to the table's column types
+        
+        Only columns listed in CSV_TYPE_CONVERTERS are touched; the rest are
+        passed through to csv.writer as-is. Returns None when no column
+        needs converting, so rows can be written without any per-row call.
+        """
+        converters = {
+            i: CSV_TYPE_CONVERTERS[attr.type.name]
+            for i, attr in enumerate(attributes)
+            if attr.type.name in CSV_TYPE_CONVERTERS
+        }
+        if not converters:
+            return None
+        
+        fields = [
+            f"(None if r[{i}] is None else _convert_{i}(r[{i}]))" if i in converters else f"r[{i}]"
+            for i in range(len(attributes))
+        ]
+        source = f"def format_row(r):\n    return ({', '.join(fields)},)\n"
+        namespace = {f"_convert_{i}": converter for i, converter in converters.items()}
+        exec(source, namespace)
+        return namespace['format_row']
+    
+    @staticmethod
+    def _quote_identifier(name: str) -> str:
+        """Quote an SQL identifier, doubling any embedded double quotes"""
+        return '"' + name.replace('"', '""') + '"'
+    
+    @classmethod
+    def _qualified_name(cls, schema: str, table_name: str) -> str:
+        """Return the quoted schema-qualified table name"""
+        return f"{cls._quote_identifier(schema)}.{cls._quote_identifier(table_name)}"
+    
+    async def _estimate_chunk_size(self, connection, table_name: str, schema: str) -> int:
+        """Pick a fetch size of roughly 1 MB per chunk from the planner's row width statistics"""
+        width_query = """
+            SELECT sum(avg_width)
+            FROM pg_stats
+            WHERE schemaname = $1 AND tablename = $2 AND NOT inherited
+        """
+        avg_width = await connection.fetchval(width_query, schema, table_name)
+        if avg_width is None:
+            # Never analyzed - fall back to a middle-of-the-road size
+            return 10000
+        # A 20-byte floor lets very narrow tables reach the 50,000-row ceiling
+        return max(256, min(50_000, 1_000_000 // max(avg_width, 20)))
+    
+    async def _get_primary_key_column(self, connection, qualified_name: str) -> Optional[str]:
+        """Return the table's primary key column, or None unless it is a single column"""
+        # Read the catalogs directly: information_schema.table_constraints hides
+        # constraints from roles that only hold SELECT on the table
+        pk_query = """
+            SELECT a.attname
+            FROM pg_index i
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+            WHERE i.indrelid = to_regclass($1) AND i.indisprimary
+        """
+        rows = await connection.fetch(pk_query, qualified_name)
+        return rows[0]['attname'] if len(rows) == 1 else None
+    
+    async def _download_table_parallel_copy(self, connection, table_name: str, qualified_name: str,
+                                            filepath: str, key_column: str, workers: int,
+                                            compression: Optional[str] = None) -> bool:
+        """
+        Download table as several COPY streams partitioned by primary key hash
+        
+        All shards read the same snapshot, exported from the coordinating
+        connection, so the result is as consistent as a single COPY. Shards
+        other than the first acquire their own pool connections while the
+        coordinator holds its own; download_all_tables keeps one connection
+        spare so those acquisitions can always make progress.
+        """
+        part_paths = [f"{filepath}.part{k}" for k in range(workers)]
+        try:
+            # Primary keys are never NULL, so every row lands in exactly one shard
+            key_hash = f"('x' || substr(md5({self._quote_identifier(key_column)}::text), 1, 8))::bit(32)::bigint"
+            shard_predicate = f"{key_hash} % {workers}"
+            
+            async def copy_shard(k, shard_connection):
+                # Compressed shards are complete gzip members, which stay
+                # valid when concatenated
+                with self._open_output(part_paths[k], compression) as output:
+                    status = await shard_connection.copy_from_query(
+                        f'SELECT * FROM {qualified_name} WHERE {shard_predicate} = {k}',
+                        output=output, format='csv', header=(k == 0),
+                        timeout=self.download_timeout
+                    )
+                return int(status.split()[-1])
+            
+            async def copy_shard_in_snapshot(k, snapshot):
+                async with self.connection_pool.acquire() as shard_connection:
+                    async with shard_connection.transaction(isolation='repeatable_read', readonly=True):
+                        await shard_connection.execute(f"SET TRANSACTION SNAPSHOT '{snapshot}'")
+                        return await copy_shard(k, shard_connection)
+            
+            # The exported snapshot stays importable only while this transaction
+            # is open, so it spans every shard
+            async with connection.transaction(isolation='repeatable_read', readonly=True):
+                snapshot = await connection.fetchval('SELECT pg_export_snapshot()')
+                
+                tasks = [asyncio.create_task(copy_shard(0, connection))] + [
+                    asyncio.create_task(copy_shard_in_snapshot(k, snapshot)) for k in range(1, workers)
+                ]
+                try:
+                    shard_rows = await asyncio.gather(*tasks)
+                finally:
+                    # If one shard failed, stop the others before their part
+                    # files are removed and their connections are reused
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+            
+            await asyncio.to_thread(self._concatenate_files, part_paths, filepath)
+            
+            logger.info(f"Downloaded large table '{table_name}' to {filepath} ({sum(shard_rows):,} rows)")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error in parallel download for '{table_name}': {e}")
+            return False
+        finally:
+            for part_path in part_paths:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+    
+    @staticmethod
+    def _open_output(path: str, compression: Optional[str] = None, text: bool = False):
+        """Open an output file for writing, compressing on the fly if requested"""
+        if compression == 'gzip':
+            # Level 1 keeps compression cheap enough to keep up with COPY
+            if text:
+                return gzip.open(path, 'wt', compresslevel=1, newline='')
+            return gzip.open(path, 'wb', compresslevel=1)
+        if text:
+            return open(path, 'w', newline='')
+        return open(path, 'wb')
+    
+    @staticmethod
+    def _concatenate_files(source_paths: List[str], destination: str):
+        """Concatenate files in order, using in-kernel copies where supported"""
+        use_sendfile = sys.platform.startswith('linux')
+        with open(destination, 'wb') as dst:
+            for source_path in source_paths:
+                with open(source_path, 'rb') as src:
+                    if use_sendfile:
+                        size = os.fstat(src.fileno()).st_size
+                        offset = 0
+                        while offset < size:
+                            offset += os.sendfile(dst.fileno(), src.fileno(), offset, size - offset)
+                    else:
+                        shutil.copyfileobj(src, dst)
+    
     async def download_all_tables(self, output_dir: str = 'downloaded_tables', 
-                                schema: str = 'public', max_concurrent: int = 3) -> Dict:
+                                schema: str = 'public', max_concurrent: Optional[int] = None,
+                                compression: Optional[str] = None) -> Dict:
         """
         Download all tables from the database with concurrent processing
         
@@ -237,6 +547,8 @@ class AsyncPostgreSQLDownloader:
             output_dir (str): Output directory for CSV files
             schema (str): Schema name (default: 'public')
             max_concurrent (int): Maximum concurrent table downloads
+                (default: one less than the pool size, capped at the number of tables)
+            compression (str): Compress output on the fly ('gzip') or None for plain CSV
             
         Returns:
             Dict: Summary of download results
@@ -245,27 +557,31 @@ class AsyncPostgreSQLDownloader:
             logger.error("No connection pool. Please create pool first.")
             return None
         
-        tables = await self.get_all_tables(schema)
-        if not tables:
+        # Table info and the column preflight (used as the existence check for
+        # every table) are independent single queries, so run them side by side
+        logger.info("Analyzing tables...")
+        table_infos, columns_map = await asyncio.gather(
+            self.get_all_table_infos(schema),
+            self.get_all_table_columns(schema)
+        )
+        if not table_infos:
             logger.warning("No tables found to download")
             return None
         
-        # Get table info for all tables first
-        logger.info("Analyzing tables...")
-        table_infos = await asyncio.gather(*[
-            self.get_table_info(table, schema) for table in tables
-        ])
+        if not max_concurrent:
+            max_concurrent = max(1, min(len(table_infos), self.max_connections - 1))
         
-        # Sort tables by size (smallest first to balance load)
-        table_infos.sort(key=lambda x: x['size_bytes'])
+        # Sort tables by size (largest first so the big ones don't start last
+        # and run alone while the other slots sit idle)
+        table_infos.sort(key=lambda x: x['size_bytes'], reverse=True)
         
         # Display table summary
         total_size = sum(info['size_bytes'] for info in table_infos)
         total_rows = sum(info['row_count'] for info in table_infos)
-        logger.info(f"Total: {len(tables)} tables, {total_rows:,} rows, {self._format_bytes(total_size)}")
+        logger.info(f"Total: {len(table_infos)} tables, {total_rows:,} rows, {self._format_bytes(total_size)}")
         
         results = {
-            'total_tables': len(tables),
+            'total_tables': len(table_infos),
             'successful_downloads': 0,
             'failed_downloads': 0,
             'downloaded_tables': [],
@@ -273,7 +589,7 @@ class AsyncPostgreSQLDownloader:
             'table_info': table_infos
         }
         
-        logger.info(f"Starting concurrent download of {len(tables)} tables (max {max_concurrent} concurrent)...")
+        logger.info(f"Starting concurrent download of {len(table_infos)} tables (max {max_concurrent} concurrent)...")
         
         # Create semaphore to limit concurrent downloads
         semaphore = asyncio.Semaphore(max_concurrent)
@@ -281,28 +597,35 @@ class AsyncPostgreSQLDownloader:
         async def download_with_semaphore(table_info):
             async with semaphore:
                 success = await self.download_table_to_csv(
-                    table_info['table_name'], output_dir, schema
+                    table_info['table_name'], output_dir, schema, columns_map=columns_map,
+                    compression=compression
                 )
                 return table_info['table_name'], success
         
-        # Execute downloads concurrently
-        download_results = await asyncio.gather(*[
-            download_with_semaphore(info) for info in table_infos
-        ], return_exceptions=True)
-        
-        # Process results
-        for result in download_results:
-            if isinstance(result, Exception):
-                logger.error(f"Download task failed: {result}")
-                results['failed_downloads'] += 1
-            else:
-                table_name, success = result
+        # Execute downloads concurrently and process each result as soon as
+        # its download finishes
+        tasks = [asyncio.create_task(download_with_semaphore(info)) for info in table_infos]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    table_name, success = await next_done
+                except Exception as e:
+                    logger.error(f"Download task failed: {e}")
+                    results['failed_downloads'] += 1
+                    continue
+                
                 if success:
                     results['successful_downloads'] += 1
                     results['downloaded_tables'].append(table_name)
                 else:
                     results['failed_downloads'] += 1
                     results['failed_tables'].append(table_name)
+        finally:
+            # If we were cancelled, don't leave downloads running (and holding
+            # pool connections) behind us
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
         
         logger.info(f"Download complete: {results['successful_downloads']}/{results['total_tables']} tables downloaded successfully")
         
@@ -311,13 +634,12 @@ class AsyncPostgreSQLDownloader:
         
         return results
     
-    def _format_bytes(self, bytes_value: int) -> str:
+    @staticmethod
+    def _format_bytes(bytes_value: int) -> str:
         """Format bytes to human readable format"""
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if bytes_value < 1024.0:
-                return f"{bytes_value:.1f} {unit}"
-            bytes_value /= 1024.0
-        return f"{bytes_value:.1f} PB"
+        # Every 10 bits is one 1024x step; bit_length avoids float log rounding
+        exponent = min(max(int(bytes_value).bit_length() - 1, 0) // 10, len(BYTE_UNITS) - 1)
+        return f"{bytes_value / 1024 ** exponent:.1f} {BYTE_UNITS[exponent]}"
     
     async def close_pool(self):
         """Close the connection pool"""
@@ -354,16 +676,17 @@ async def main():
     # Configuration from environment variables with defaults
     OUTPUT_DIR = os.getenv('OUTPUT_DIR', 'downloaded_tables')
     SCHEMA = os.getenv('DB_SCHEMA', 'public')
-    MAX_CONCURRENT = int(os.getenv('MAX_CONCURRENT_DOWNLOADS', 3))
+    MAX_CONCURRENT = int(os.getenv('MAX_CONCURRENT_DOWNLOADS', 0)) or None
+    COMPRESSION = os.getenv('COMPRESSION') or None
     
     # Create downloader instance
     downloader = AsyncPostgreSQLDownloader(**DB_CONFIG)
     
     try:
         # Create connection pool
-        if await downloader.create_pool():
+        if await downloader.create_pool(MAX_CONCURRENT):
             # Download all tables
-            results = await downloader.download_all_tables(OUTPUT_DIR, SCHEMA, MAX_CONCURRENT)
+            results = await downloader.download_all_tables(OUTPUT_DIR, SCHEMA, MAX_CONCURRENT, COMPRESSION)
             
             if results:
                 print("\n" + "="*60)
@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 import pytest_asyncio
 import os
@@ -38,6 +39,17 @@ async def downloader(test_config):
     yield downloader
     await downloader.close_pool()
 
+@pytest_asyncio.fixture
+async def reader_config(downloader, test_config):
+    """Create a login role without privileges; tests grant what they need"""
+    async with downloader.connection_pool.acquire() as connection:
+        await connection.execute("CREATE ROLE backup_reader LOGIN PASSWORD 'readerpass'")
+    yield {**test_config, 'username': 'backup_reader', 'password': 'readerpass'}
+    async with downloader.connection_pool.acquire() as connection:
+        # DROP OWNED also revokes every privilege granted to the role
+        await connection.execute('DROP OWNED BY backup_reader')
+        await connection.execute('DROP ROLE backup_reader')
+
 class TestAsyncPostgreSQLDownloader:
     
     @pytest.mark.asyncio
@@ -49,6 +61,15 @@ class TestAsyncPostgreSQLDownloader:
         assert downloader.connection_pool is not None
         await downloader.close_pool()
     
+    @pytest.mark.asyncio
+    async def test_pool_grows_for_concurrent_downloads(self, test_config):
+        """Test that the pool leaves a spare connection beyond max_concurrent"""
+        downloader = AsyncPostgreSQLDownloader(**test_config, max_connections=2)
+        assert await downloader.create_pool(max_concurrent=4) is True
+        assert downloader.max_connections == 5
+        assert downloader.connection_pool.get_max_size() == 5
+        await downloader.close_pool()
+    
     @pytest.mark.asyncio
     async def test_invalid_connection(self):
         """Test connection with invalid credentials"""
@@ -85,6 +106,42 @@ class TestAsyncPostgreSQLDownloader:
         assert 'size_bytes' in info
         assert info['size_bytes'] >= 0
     
+    @pytest.mark.asyncio
+    async def test_get_all_table_infos(self, downloader):
+        """Test getting information for all tables in one query"""
+        infos = await downloader.get_all_table_infos()
+        
+        by_name = {info['table_name']: info for info in infos}
+        assert {'users', 'orders', 'products'}.issubset(by_name)
+        for info in by_name.values():
+            assert info['row_count'] >= 0
+            assert info['size_bytes'] >= 0
+            assert 'size' in info
+    
+    @pytest.mark.asyncio
+    async def test_get_all_table_infos_skips_unreadable_tables(self, downloader, reader_config):
+        """Test that tables the role cannot SELECT from are not scheduled"""
+        async with downloader.connection_pool.acquire() as connection:
+            await connection.execute('GRANT SELECT ON users TO backup_reader')
+        
+        reader = AsyncPostgreSQLDownloader(**reader_config)
+        try:
+            assert await reader.create_pool() is True
+            infos = await reader.get_all_table_infos()
+            assert [info['table_name'] for info in infos] == ['users']
+            assert await reader.get_all_tables() == ['users']
+        finally:
+            await reader.close_pool()
+    
+    @pytest.mark.asyncio
+    async def test_get_all_table_columns(self, downloader):
+        """Test fetching column names for all tables at once"""
+        columns_map = await downloader.get_all_table_columns()
+        
+        assert columns_map['users'] == ['id', 'name', 'email', 'created_at']
+        assert 'orders' in columns_map
+        assert 'products' in columns_map
+    
     @pytest.mark.asyncio
     async def test_download_single_table(self, downloader, temp_output_dir):
         """Test downloading a single table"""
@@ -144,12 +201,37 @@ class TestAsyncPostgreSQLDownloader:
             csv_files = list(Path(temp_output_dir).glob(f'{table}_*.csv'))
             assert len(csv_files) == 1, f"No CSV file found for table {table}"
     
+    @pytest.mark.asyncio
+    async def test_cancel_download_all_tables(self, downloader, temp_output_dir):
+        """Test that cancelling download_all_tables stops its downloads"""
+        started = asyncio.Event()
+        
+        async def slow_download(*args, **kwargs):
+            async with downloader.connection_pool.acquire():
+                started.set()
+                await asyncio.sleep(30)
+            return True
+        
+        with patch.object(downloader, 'download_table_to_csv', slow_download):
+            run = asyncio.create_task(downloader.download_all_tables(temp_output_dir, max_concurrent=2))
+            await asyncio.wait_for(started.wait(), timeout=5)
+            others = asyncio.all_tasks() - {run, asyncio.current_task()}
+            
+            run.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await run
+        
+        assert others
+        assert all(task.done() for task in others)
+        pool = downloader.connection_pool
+        assert pool.get_idle_size() == pool.get_size()
+    
     @pytest.mark.asyncio
     async def test_chunked_download_simulation(self, downloader, temp_output_dir):
         """Test chunked download by forcing small chunk size"""
         # Use a very small chunk size to force chunking even with small test data
         result = await downloader.download_table_to_csv(
-            'orders', temp_output_dir, chunk_size=1
+            'orders', temp_output_dir, chunk_size=1, use_copy=False
         )
         assert result is True
         
@@ -160,11 +242,229 @@ class TestAsyncPostgreSQLDownloader:
         df = pd.read_csv(csv_files[0])
         assert len(df) >= 4  # We inserted 4 orders in CI setup
     
+    @pytest.mark.asyncio
+    async def test_estimate_chunk_size(self, downloader):
+        """Test that the fetch size follows the table's row width"""
+        async with downloader.connection_pool.acquire() as connection:
+            await connection.execute('CREATE TABLE narrow_test_table (flag BOOLEAN)')
+            await connection.execute('CREATE TABLE medium_test_table (a BIGINT, b BIGINT, c BIGINT, d BIGINT, e BIGINT)')
+            # PLAIN storage keeps the padded value inline and uncompressed, so
+            # its full width shows up in the statistics
+            await connection.execute('CREATE TABLE wide_test_table (body TEXT)')
+            await connection.execute('ALTER TABLE wide_test_table ALTER COLUMN body SET STORAGE PLAIN')
+            try:
+                await connection.execute('INSERT INTO narrow_test_table VALUES (true), (false)')
+                await connection.execute('INSERT INTO medium_test_table VALUES (1, 2, 3, 4, 5)')
+                await connection.execute("INSERT INTO wide_test_table VALUES (repeat('x', 5000))")
+                await connection.execute('ANALYZE narrow_test_table, medium_test_table, wide_test_table')
+                
+                # Very narrow rows reach the upper bound
+                assert await downloader._estimate_chunk_size(connection, 'narrow_test_table', 'public') == 50_000
+                # Five 8-byte columns: 1,000,000 // 40
+                assert await downloader._estimate_chunk_size(connection, 'medium_test_table', 'public') == 25_000
+                # ~5 kB rows hit the lower bound
+                assert await downloader._estimate_chunk_size(connection, 'wide_test_table', 'public') == 256
+            finally:
+                await connection.execute('DROP TABLE narrow_test_table, medium_test_table, wide_test_table')
+            
+            # No statistics yet - default size
+            assert await downloader._estimate_chunk_size(connection, 'nonexistent_table', 'public') == 10000
+    
+    @pytest.mark.asyncio
+    async def test_chunked_download_empty_table(self, downloader, temp_output_dir):
+        """Test that chunked download still writes headers for an empty table"""
+        async with downloader.connection_pool.acquire() as connection:
+            await connection.execute("""
+                CREATE TABLE IF NOT EXISTS empty_test_table (
+                    id SERIAL PRIMARY KEY,
+                    name VARCHAR(100)
+                )
+            """)
+        
+        result = await downloader.download_table_to_csv(
+            'empty_test_table', temp_output_dir, use_copy=False
+        )
+        assert result is True
+        
+        csv_files = list(Path(temp_output_dir).glob('empty_test_table_*.csv'))
+        assert len(csv_files) == 1
+        
+        df = pd.read_csv(csv_files[0])
+        assert len(df) == 0
+        assert list(df.columns) == ['id', 'name']
+    
+    @pytest.mark.asyncio
+    async def test_chunked_download_converts_bool_and_bytea(self, downloader, temp_output_dir):
+        """Test that chunked output writes bool and bytea columns like COPY does"""
+        async with downloader.connection_pool.acquire() as connection:
+            await connection.execute("""
+                CREATE TABLE typed_test_table (
+                    id INTEGER PRIMARY KEY,
+                    active BOOLEAN,
+                    payload BYTEA,
+                    note TEXT
+                )
+            """)
+            await connection.execute("""
+                INSERT INTO typed_test_table VALUES
+                    (1, true, '\\x00ff'::bytea, 'a, "quoted" note'),
+                    (2, false, NULL, NULL),
+                    (3, NULL, ''::bytea, 'plain')
+            """)
+        
+        try:
+            copy_dir = os.path.join(temp_output_dir, 'copy')
+            chunked_dir = os.path.join(temp_output_dir, 'chunked')
+            assert await downloader.download_table_to_csv('typed_test_table', copy_dir) is True
+            assert await downloader.download_table_to_csv(
+                'typed_test_table', chunked_dir, use_copy=False, chunk_size=2
+            ) is True
+            
+            copy_file, = Path(copy_dir).glob('typed_test_table_*.csv')
+            chunked_file, = Path(chunked_dir).glob('typed_test_table_*.csv')
+            assert chunked_file.read_text() == copy_file.read_text()
+        finally:
+            async with downloader.connection_pool.acquire() as connection:
+                await connection.execute('DROP TABLE typed_test_table')
+    
+    @pytest.mark.asyncio
+    async def test_parallel_copy_download(self, downloader, temp_output_dir):
+        """Test that a table split into parallel COPY streams is complete"""
+        async with downloader.connection_pool.acquire() as connection:
+            # Row counts are planner estimates, so refresh statistics first
+            await connection.execute('ANALYZE orders')
+            expected_ids = {row['id'] for row in await connection.fetch('SELECT id FROM orders')}
+        
+        result = await downloader.download_table_to_csv(
+            'orders', temp_output_dir, parallel_threshold=0, parallel_workers=3
+        )
+        assert result is True
+        
+        csv_files = list(Path(temp_output_dir).glob('orders_*.csv'))
+        assert len(csv_files) == 1
+        assert not list(Path(temp_output_dir).glob('*.part*'))
+        
+        df = pd.read_csv(csv_files[0])
+        assert 'amount' in df.columns
+        assert set(df['id']) == expected_ids
+        assert len(df) == len(expected_ids)
+    
+    @pytest.mark.asyncio
+    async def test_download_compressed(self, downloader, temp_output_dir):
+        """Test gzip-compressed output for COPY, parallel and chunked downloads"""
+        async with downloader.connection_pool.acquire() as connection:
+            await connection.execute('ANALYZE orders')
+        
+        downloads = {
+            'copy': {},
+            'parallel': {'parallel_threshold': 0, 'parallel_workers': 2},
+            'chunked': {'use_copy': False, 'chunk_size': 1},
+        }
+        for mode, options in downloads.items():
+            output_dir = os.path.join(temp_output_dir, mode)
+            result = await downloader.download_table_to_csv(
+                'orders', output_dir, compression='gzip', **options
+            )
+            assert result is True
+            
+            csv_files = list(Path(output_dir).glob('orders_*.csv.gz'))
+            assert len(csv_files) == 1, mode
+            
+            df = pd.read_csv(csv_files[0])
+            assert 'amount' in df.columns
+            assert len(df) >= 4
+    
+    @pytest.mark.asyncio
+    async def test_unsupported_compression(self, downloader, temp_output_dir):
+        """Test that an unknown compression format fails the download"""
+        result = await downloader.download_table_to_csv('users', temp_output_dir, compression='rar')
+        assert result is False
+    
+    @pytest.mark.asyncio
+    async def test_parallel_copy_shard_failure(self, downloader, temp_output_dir):
+        """Test that a failing shard stops the others and leaves nothing behind"""
+        async with downloader.connection_pool.acquire() as connection:
+            await connection.execute('ANALYZE orders')
+        
+        open_output = downloader._open_output
+        
+        def failing_open_output(path, *args, **kwargs):
+            if path.endswith('.part1'):
+                raise OSError('disk full')
+            return open_output(path, *args, **kwargs)
+        
+        with patch.object(downloader, '_open_output', failing_open_output):
+            result = await downloader.download_table_to_csv(
+                'orders', temp_output_dir, parallel_threshold=0, parallel_workers=3
+            )
+        assert result is False
+        assert not list(Path(temp_output_dir).glob('*.part*'))
+        
+        pool = downloader.connection_pool
+        assert pool.get_idle_size() == pool.get_size()
+    
+    @pytest.mark.asyncio
+    async def test_parallel_copy_as_select_only_role(self, downloader, reader_config,
+                                                     temp_output_dir, caplog):
+        """Test that a role holding only SELECT still gets the parallel path"""
+        async with downloader.connection_pool.acquire() as connection:
+            await connection.execute('GRANT SELECT ON orders TO backup_reader')
+            await connection.execute('ANALYZE orders')
+        
+        reader = AsyncPostgreSQLDownloader(**reader_config)
+        try:
+            assert await reader.create_pool() is True
+            with caplog.at_level('INFO'):
+                result = await reader.download_table_to_csv(
+                    'orders', temp_output_dir, parallel_threshold=0, parallel_workers=2
+                )
+            assert result is True
+            assert 'Using 2 parallel COPY streams' in caplog.text
+            
+            csv_files = list(Path(temp_output_dir).glob('orders_*.csv'))
+            assert len(csv_files) == 1
+            assert len(pd.read_csv(csv_files[0])) >= 4
+        finally:
+            await reader.close_pool()
+    
     @pytest.mark.asyncio
     async def test_nonexistent_table(self, downloader, temp_output_dir):
         """Test handling of non-existent table"""
         result = await downloader.download_table_to_csv('nonexistent_table', temp_output_dir)
         assert result is False
+        
+        # Same outcome when existence comes from a pre-fetched column map
+        columns_map = await downloader.get_all_table_columns()
+        result = await downloader.download_table_to_csv(
+            'nonexistent_table', temp_output_dir, columns_map=columns_map
+        )
+        assert result is False
+    
+    @pytest.mark.asyncio
+    async def test_download_table_with_quoted_name(self, downloader, temp_output_dir):
+        """Test tables whose names need quoting"""
+        async with downloader.connection_pool.acquire() as connection:
+            await connection.execute('''
+                CREATE TABLE "Mixed""Case" (id INTEGER PRIMARY KEY)
+            ''')
+            await connection.execute('''
+                INSERT INTO "Mixed""Case" VALUES (1), (2)
+            ''')
+        
+        try:
+            info = await downloader.get_table_info('Mixed"Case')
+            assert info['size'] != 'Unknown'
+            
+            result = await downloader.download_table_to_csv('Mixed"Case', temp_output_dir)
+            assert result is True
+            
+            csv_files = list(Path(temp_output_dir).glob('Mixed"Case_*.csv'))
+            assert len(csv_files) == 1
+            assert len(pd.read_csv(csv_files[0])) == 2
+        finally:
+            # Don't leave the table behind for the other tests or the CI backup run
+            async with downloader.connection_pool.acquire() as connection:
+                await connection.execute('''DROP TABLE "Mixed""Case"''')
     
     def test_format_bytes(self):
         """Test byte formatting utility"""